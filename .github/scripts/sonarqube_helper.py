@@ -3,13 +3,19 @@
 # ABOUTME: Fetches issues from SonarQube API and uses agents to fix them
 
 import os
+import re
 import sys
+import hmac
 import json
+import difflib
+import hashlib
 import httpx
 import asyncio
-from typing import Optional, Literal
+import subprocess
+from typing import Callable, Optional, Literal
 from pathlib import Path
 from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from loguru import logger
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
@@ -20,8 +26,42 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 from rich.markdown import Markdown
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx (pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 console = Console()
 
+# Matches the target side of a unified diff hunk header: @@ -a,b +c,d @@
+HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+# Number of component keys sent per issues/search request (keeps URLs short)
+COMPONENT_BATCH_SIZE = 50
+
+# issues/search refuses to page past this many results for one query
+SEARCH_RESULT_LIMIT = 10000
+
+# Limits for the watch-mode webhook endpoint (SonarQube payloads are a few KB)
+WEBHOOK_MAX_BODY_SIZE = 64 * 1024
+WEBHOOK_MAX_LINE_SIZE = 8 * 1024
+WEBHOOK_MAX_HEADERS = 100
+WEBHOOK_READ_TIMEOUT = 10.0
+
+# Files whose issues are all minor code smells can be routed to the fast model
+FAST_MODEL_TYPES = {"CODE_SMELL"}
+FAST_MODEL_SEVERITIES = {"MINOR", "INFO"}
+
+ANALYSIS_SYSTEM_PROMPT = """You are a code quality expert specializing in fixing SonarQube issues.
+Your goal is to propose clear, safe, and effective fixes for code quality issues.
+Always consider the context of the entire file when proposing fixes.
+Prioritize fixes that improve code quality without changing functionality."""
+
+FIXING_SYSTEM_PROMPT = """You are a precise code editor. Apply the requested fixes exactly.
+Return only the complete fixed file content with no additional commentary.
+Ensure all fixes are applied correctly and the code remains syntactically valid."""
+
 
 class SonarQubeSettings(BaseSettings):
     """SonarQube configuration from environment variables."""
@@ -29,6 +69,7 @@ class SonarQubeSettings(BaseSettings):
     sonar_url: str = Field(default="", env="SONAR_URL")
     sonar_token: str = Field(default="", env="SONAR_TOKEN")
     sonar_project_key: str = Field(default="", env="SONAR_PROJECT_KEY")
+    sonar_webhook_secret: str = Field(default="", env="SONAR_WEBHOOK_SECRET")
 
     class Config:
         env_file = ".env"
@@ -36,6 +77,28 @@ class SonarQubeSettings(BaseSettings):
         extra = "ignore"  # Ignore extra fields from .env
 
 
+class BatchTarget(BaseModel):
+    """A project/branch (or pull request) to fetch in batch mode."""
+
+    project_key: str
+    branch: Optional[str] = None
+    pull_request: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Human-readable target name."""
+        if self.pull_request:
+            return f"{self.project_key}@pr:{self.pull_request}"
+        if self.branch:
+            return f"{self.project_key}@{self.branch}"
+        return self.project_key
+
+    @property
+    def export_stem(self) -> str:
+        """File-system safe base name for this target's export."""
+        return re.sub(r"[^A-Za-z0-9._-]", "_", self.label.replace("@", "__"))
+
+
 class SonarIssue(BaseModel):
     """Represents a SonarQube issue."""
 
@@ -53,6 +116,14 @@ class SonarIssue(BaseModel):
     effort: Optional[str] = None
     debt: Optional[str] = None
     tags: list[str] = Field(default_factory=list)
+    updateDate: Optional[str] = None
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        """Parsed last update time (SonarQube format: 2025-10-17T11:30:00+0000)."""
+        if not self.updateDate:
+            return None
+        return datetime.strptime(self.updateDate, "%Y-%m-%dT%H:%M:%S%z")
 
     @property
     def file_path(self) -> str:
@@ -93,15 +164,106 @@ class FileFixes(BaseModel):
     file_content: Optional[str] = None
 
 
+class ModelBackend(BaseModel):
+    """An OpenAI-compatible model endpoint agents can run against."""
+
+    model_name: str
+    base_url: Optional[str] = None  # None uses the OpenAI API
+    api_key: Optional[str] = None  # None reads OPENAI_API_KEY
+    timeout: float = 120.0
+    max_connections: int = 10
+
+
+OLLAMA_ENDPOINT = os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434")
+
+MODEL_BACKENDS: dict[str, ModelBackend] = {
+    "gpt-4o": ModelBackend(model_name="gpt-4o", timeout=120.0),
+    "gpt-4o-mini": ModelBackend(model_name="gpt-4o-mini", timeout=60.0),
+    "ollama": ModelBackend(
+        model_name=os.getenv("OLLAMA_MODEL", "qwen:3b"),
+        base_url=f"{OLLAMA_ENDPOINT}/v1",
+        api_key="ollama",  # Required by the client, ignored by Ollama
+        timeout=300.0,
+        max_connections=2
+    ),
+}
+
+
+class ModelPool:
+    """Long-lived agents and pooled HTTP clients shared across all files."""
+
+    def __init__(self, backends: dict[str, ModelBackend]):
+        self.backends = backends
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._agents: dict[tuple[str, str], Agent] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._agents.clear()
+
+    def _client(self, name: str) -> httpx.AsyncClient:
+        if name not in self._clients:
+            backend = self.backends[name]
+            self._clients[name] = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(backend.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=backend.max_connections,
+                    max_keepalive_connections=backend.max_connections,
+                    keepalive_expiry=60.0
+                )
+            )
+        return self._clients[name]
+
+    def agent(self, name: str, role: Literal["analysis", "fixing"]) -> Agent:
+        """Get (or create once) the agent for a backend and role."""
+        if (name, role) not in self._agents:
+            # Imported here so fetch/export-only runs don't depend on the model API
+            try:
+                from pydantic_ai.models.openai import OpenAIChatModel
+            except ImportError:  # pydantic-ai < 1.0
+                from pydantic_ai.models.openai import OpenAIModel as OpenAIChatModel
+            from pydantic_ai.providers.openai import OpenAIProvider
+
+            backend = self.backends[name]
+            model = OpenAIChatModel(
+                backend.model_name,
+                provider=OpenAIProvider(
+                    base_url=backend.base_url,
+                    api_key=backend.api_key,
+                    http_client=self._client(name)
+                )
+            )
+            self._agents[(name, role)] = Agent(
+                model,
+                system_prompt=ANALYSIS_SYSTEM_PROMPT if role == "analysis" else FIXING_SYSTEM_PROMPT
+            )
+        return self._agents[(name, role)]
+
+
 class SonarQubeClient:
     """Client for interacting with SonarQube API."""
 
-    def __init__(self, base_url: str, token: str):
+    def __init__(self, base_url: str, token: str, max_concurrency: int = 10):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
         self.base_url = base_url.rstrip("/")
         self.token = token
+        # Global cap on in-flight requests, shared by every caller of this client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
         self.client = httpx.AsyncClient(
             headers={"Authorization": f"Bearer {token}"},
-            timeout=30.0
+            timeout=30.0,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency
+            )
         )
 
     async def __aenter__(self):
@@ -119,6 +281,11 @@ class SonarQubeClient:
         statuses: Optional[list[str]] = None,
         branch: Optional[str] = None,
         pull_request: Optional[str] = None,
+        paths: Optional[list[str]] = None,
+        updated_since: Optional[datetime] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        issue_filter: Optional[Callable[[SonarIssue], bool]] = None,
         max_issues: int = 10000
     ) -> list[SonarIssue]:
         """
@@ -132,44 +299,182 @@ class SonarQubeClient:
             statuses: Filter by statuses (OPEN, CONFIRMED, REOPENED, RESOLVED, CLOSED)
             branch: Filter by branch name (e.g., 'main', 'develop')
             pull_request: Filter by pull request ID/key (not available in Community Edition)
+            paths: Only fetch issues under these file or directory paths (relative to the project root)
+            updated_since: Only fetch issues created or updated at or after this time
+            created_after: Only fetch issues created at or after this time
+            created_before: Only fetch issues created before this time
+            issue_filter: Local predicate applied while paging, before max_issues is enforced
             max_issues: Maximum number of issues to retrieve (hard limit 10000)
 
         Returns:
             List of SonarIssue objects
         """
+        base_params = {"projectKeys": project_key}
+
+        if severities:
+            base_params["severities"] = ",".join(severities)
+        if impact_severities:
+            base_params["impactSeverities"] = ",".join(impact_severities)
+        if types:
+            base_params["types"] = ",".join(types)
+        if statuses:
+            base_params["statuses"] = ",".join(statuses)
+        if branch:
+            base_params["branch"] = branch
+        if pull_request:
+            base_params["pullRequest"] = pull_request
+        if created_after:
+            base_params["createdAfter"] = created_after.strftime("%Y-%m-%dT%H:%M:%S%z")
+        if created_before:
+            base_params["createdBefore"] = created_before.strftime("%Y-%m-%dT%H:%M:%S%z")
+        if updated_since:
+            # Newest first, so paging can stop at the first issue older than the cutoff
+            base_params["s"] = "UPDATE_DATE"
+            base_params["asc"] = "false"
+
+        if paths is None:
+            return await self._search_issues(base_params, max_issues, updated_since, issue_filter)
+
+        # Scope the query to specific files/directories via their component
+        # keys. issues/search rejects keys of mixed qualifiers (e.g. FIL and
+        # UTS for test files), so each qualifier is queried separately, in
+        # batches so the request URL stays within server limits
+        components = await self.resolve_components(project_key, paths, branch, pull_request)
+        all_issues = []
+        for component_keys in components.values():
+            for i in range(0, len(component_keys), COMPONENT_BATCH_SIZE):
+                if len(all_issues) >= max_issues:
+                    break
+                params = {
+                    **base_params,
+                    "componentKeys": ",".join(component_keys[i:i + COMPONENT_BATCH_SIZE])
+                }
+                all_issues.extend(
+                    await self._search_issues(params, max_issues - len(all_issues), updated_since, issue_filter)
+                )
+
+        return all_issues[:max_issues]
+
+    async def resolve_components(
+        self,
+        project_key: str,
+        paths: list[str],
+        branch: Optional[str] = None,
+        pull_request: Optional[str] = None
+    ) -> dict[str, list[str]]:
+        """
+        Look up component keys for project-relative paths, grouped by qualifier.
+
+        Paths SonarQube does not know (e.g. files it never analyzed) are skipped.
+        A directory key only matches issues directly inside it, so directories
+        are expanded to include all of their subdirectories.
+
+        Returns:
+            Mapping of qualifier (FIL, UTS, DIR, ...) to component keys
+        """
+        params = {}
+        if branch:
+            params["branch"] = branch
+        if pull_request:
+            params["pullRequest"] = pull_request
+
+        async def show(path: str) -> Optional[dict]:
+            async with self._semaphore:
+                response = await self.client.get(
+                    f"{self.base_url}/api/components/show",
+                    params={**params, "component": f"{project_key}:{path}"}
+                )
+            if response.status_code == 404:
+                logger.info(f"No SonarQube component for {path}, skipping")
+                return None
+            response.raise_for_status()
+            return response.json().get("component")
+
+        grouped = defaultdict(list)
+        for component in await asyncio.gather(*(show(path) for path in paths)):
+            if component:
+                grouped[component["qualifier"]].append(component["key"])
+
+        if "DIR" in grouped:
+            subdirectories = await asyncio.gather(*(
+                self._list_components(key, "DIR", params) for key in grouped["DIR"]
+            ))
+            grouped["DIR"] = sorted(set(grouped["DIR"]).union(*subdirectories))
+
+        return dict(grouped)
+
+    async def _list_components(self, component_key: str, qualifier: str, params: dict) -> list[str]:
+        """List the keys of all descendants of a component with the given qualifier."""
+        keys = []
+        page = 1
+        page_size = 500  # Max allowed by SonarQube
+
+        while True:
+            async with self._semaphore:
+                response = await self.client.get(
+                    f"{self.base_url}/api/components/tree",
+                    params={
+                        **params,
+                        "component": component_key,
+                        "qualifiers": qualifier,
+                        "strategy": "all",
+                        "ps": page_size,
+                        "p": page
+                    }
+                )
+            response.raise_for_status()
+            data = response.json()
+
+            components = data.get("components", [])
+            keys.extend(component["key"] for component in components)
+
+            total = data.get("paging", {}).get("total", 0)
+            if page * page_size >= total or len(components) < page_size:
+                return keys
+
+            page += 1
+
+    async def _search_issues(
+        self,
+        base_params: dict,
+        max_issues: int,
+        updated_since: Optional[datetime] = None,
+        issue_filter: Optional[Callable[[SonarIssue], bool]] = None
+    ) -> list[SonarIssue]:
+        """Page through issues/search for a single set of query parameters."""
         all_issues = []
         page = 1
         page_size = 500  # Max allowed by SonarQube
 
         while len(all_issues) < max_issues:
             params = {
-                "projectKeys": project_key,
+                **base_params,
                 "ps": page_size,
                 "p": page
             }
 
-            if severities:
-                params["severities"] = ",".join(severities)
-            if impact_severities:
-                params["impactSeverities"] = ",".join(impact_severities)
-            if types:
-                params["types"] = ",".join(types)
-            if statuses:
-                params["statuses"] = ",".join(statuses)
-            if branch:
-                params["branch"] = branch
-            if pull_request:
-                params["pullRequest"] = pull_request
-
             try:
-                response = await self.client.get(
-                    f"{self.base_url}/api/issues/search",
-                    params=params
-                )
+                async with self._semaphore:
+                    response = await self.client.get(
+                        f"{self.base_url}/api/issues/search",
+                        params=params
+                    )
                 response.raise_for_status()
                 data = response.json()
 
                 issues = [SonarIssue(**issue) for issue in data.get("issues", [])]
+                page_count = len(issues)
+
+                # Results are sorted by update date, so anything older ends the scan
+                reached_cutoff = False
+                if updated_since:
+                    issues = [i for i in issues if i.updated_at is None or i.updated_at >= updated_since]
+                    reached_cutoff = len(issues) < page_count
+
+                # Filter before counting, so max_issues applies to kept issues only
+                if issue_filter:
+                    issues = [i for i in issues if issue_filter(i)]
+
                 all_issues.extend(issues)
 
                 # Check if we've reached the end
@@ -178,7 +483,11 @@ class SonarQubeClient:
 
                 logger.info(f"Retrieved page {page}: {len(issues)} issues (total so far: {len(all_issues)}/{total})")
 
-                if len(all_issues) >= total or len(issues) < page_size:
+                if (
+                    reached_cutoff
+                    or page * page_size >= min(total, SEARCH_RESULT_LIMIT)
+                    or page_count < page_size
+                ):
                     break
 
                 page += 1
@@ -195,10 +504,11 @@ class SonarQubeClient:
     async def get_issue_details(self, issue_key: str) -> dict:
         """Get detailed information about a specific issue."""
         try:
-            response = await self.client.get(
-                f"{self.base_url}/api/issues/search",
-                params={"issues": issue_key}
-            )
+            async with self._semaphore:
+                response = await self.client.get(
+                    f"{self.base_url}/api/issues/search",
+                    params={"issues": issue_key}
+                )
             response.raise_for_status()
             data = response.json()
 
@@ -212,6 +522,104 @@ class SonarQubeClient:
             raise
 
 
+def load_settings(require_project_key: bool = True) -> SonarQubeSettings:
+    """Load SonarQube settings, exiting with a hint if anything required is missing."""
+    try:
+        settings = SonarQubeSettings()
+    except Exception as e:
+        console.print(f"[red]Error loading settings: {e}[/red]")
+        _print_settings_help(require_project_key)
+        sys.exit(1)
+
+    if not settings.sonar_url or not settings.sonar_token or (require_project_key and not settings.sonar_project_key):
+        console.print("[red]Missing required SonarQube configuration![/red]")
+        _print_settings_help(require_project_key)
+        sys.exit(1)
+
+    return settings
+
+
+def _print_settings_help(require_project_key: bool) -> None:
+    console.print("\n[yellow]Please set the following environment variables:[/yellow]")
+    console.print("  SONAR_URL - Your SonarQube server URL")
+    console.print("  SONAR_TOKEN - Your SonarQube authentication token")
+    if require_project_key:
+        console.print("  SONAR_PROJECT_KEY - Your project key in SonarQube")
+
+
+def parse_target(spec: str) -> BatchTarget:
+    """Parse a `PROJECT`, `PROJECT@BRANCH` or `PROJECT@pr:NUMBER` target spec."""
+    project_key, _, ref = spec.partition("@")
+    if ref.startswith("pr:"):
+        return BatchTarget(project_key=project_key, pull_request=ref[3:])
+    return BatchTarget(project_key=project_key, branch=ref or None)
+
+
+def load_targets(path: Path) -> list[BatchTarget]:
+    """
+    Load batch targets from a JSON file.
+
+    The file holds a list whose entries are either target specs
+    (`"PROJECT@BRANCH"`) or objects with `project_key`, `branch` and
+    `pull_request` fields.
+    """
+    entries = json.loads(path.read_text())
+    return [
+        parse_target(entry) if isinstance(entry, str) else BatchTarget(**entry)
+        for entry in entries
+    ]
+
+
+def unique_export_names(targets: list[BatchTarget]) -> list[str]:
+    """
+    Assign each target an export file name, suffixing collisions.
+
+    Different targets can sanitize to the same stem (`feat/x` and `feat_x`),
+    and the same target can be listed twice; names are compared
+    case-insensitively so exports never overwrite each other.
+    """
+    names = []
+    used = {"summary.json"}  # Reserved for the combined batch summary
+    for target in targets:
+        stem = target.export_stem
+        name = f"{stem}.json"
+        suffix = 2
+        while name.lower() in used:
+            name = f"{stem}-{suffix}.json"
+            suffix += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def build_issues_export(issues_by_file: dict[str, list[SonarIssue]], metadata: dict) -> dict:
+    """Build the JSON export consumed by the /sonarqube-fix command."""
+    return {
+        "metadata": {
+            **metadata,
+            "total_issues": sum(len(file_issues) for file_issues in issues_by_file.values()),
+            "total_files": len(issues_by_file),
+            "fetched_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        },
+        "issues_by_file": {
+            file_path: [
+                {
+                    "key": issue.key,
+                    "rule": issue.rule,
+                    "severity": issue.severity,
+                    "line": issue.line,
+                    "message": issue.message,
+                    "type": issue.type,
+                    "status": issue.status,
+                    "effort": issue.effort
+                }
+                for issue in file_issues
+            ]
+            for file_path, file_issues in issues_by_file.items()
+        }
+    }
+
+
 def group_issues_by_file(issues: list[SonarIssue]) -> dict[str, list[SonarIssue]]:
     """Group issues by file path."""
     grouped = defaultdict(list)
@@ -220,10 +628,203 @@ def group_issues_by_file(issues: list[SonarIssue]) -> dict[str, list[SonarIssue]
     return dict(grouped)
 
 
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a path glob into a regex (`**` spans directories, `*` does not)."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    # A pattern matching a directory also matches everything beneath it
+    return "".join(parts) + "(?:/.*)?"
+
+
+def _normalize_glob(pattern: str) -> str:
+    """Strip leading './' and trailing '/' so patterns are relative to the project root."""
+    if pattern.startswith("./"):
+        pattern = pattern[2:]
+    return pattern.rstrip("/")
+
+
+def compile_path_matcher(
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None
+) -> Callable[[str], bool]:
+    """
+    Compile include/exclude globs into a single path predicate.
+
+    Patterns are relative to the project root; `src/` and `src` both match
+    everything under `src`, and an empty pattern (`./`) matches every path.
+    A path is accepted when it matches any include pattern (or no includes
+    are given) and no exclude pattern.
+    """
+    def to_regex(pattern: str) -> str:
+        pattern = _normalize_glob(pattern)
+        return _glob_to_regex(pattern) if pattern else ".*"
+
+    def combine(patterns: Optional[list[str]]) -> Optional[re.Pattern]:
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{to_regex(p)})" for p in patterns))
+
+    include_re = combine(include)
+    exclude_re = combine(exclude)
+
+    def matches(path: str) -> bool:
+        if include_re and not include_re.fullmatch(path):
+            return False
+        return not (exclude_re and exclude_re.fullmatch(path))
+
+    return matches
+
+
+def get_server_side_paths(include: list[str]) -> Optional[list[str]]:
+    """
+    Reduce include globs to the literal path prefixes the API can filter on.
+
+    `src/**/*.py` becomes `src`, `run_workflows.py` stays as is. Returns None
+    when any pattern has no literal prefix (e.g. `**/*.py`), since the query
+    can then not be narrowed without dropping matches.
+    """
+    prefixes = set()
+    for pattern in include:
+        pattern = _normalize_glob(pattern)
+        wildcard = min((pattern.find(c) for c in "*?" if c in pattern), default=-1)
+        if wildcard == -1:
+            prefix = pattern
+        else:
+            prefix = pattern[:wildcard].rpartition("/")[0]
+        if not prefix:
+            return None
+        prefixes.add(prefix)
+
+    # Drop prefixes already covered by a parent directory
+    return sorted(
+        prefix for prefix in prefixes
+        if not any(prefix.startswith(f"{other}/") for other in prefixes)
+    )
+
+
+def get_changed_line_ranges(ref: str, repo_root: Path) -> dict[str, list[tuple[int, int]]]:
+    """
+    Compute changed files and line ranges from local git.
+
+    Diffs the working tree against the merge base of `ref` and HEAD, so only
+    changes made on the current branch are reported. Deleted files are skipped.
+    Paths are relative to the top of the git checkout, matching SonarQube's
+    project-relative component paths regardless of the working directory.
+
+    Args:
+        ref: Git ref to compare against (e.g., 'origin/main')
+        repo_root: Repository root directory
+
+    Returns:
+        Mapping of file path to a list of (start_line, end_line) ranges
+    """
+    toplevel = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"],
+        cwd=repo_root,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.strip()
+
+    merge_base = subprocess.run(
+        ["git", "merge-base", ref, "HEAD"],
+        cwd=toplevel,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.strip()
+
+    diff = subprocess.run(
+        [
+            "git", "-c", "core.quotePath=false", "diff",
+            "--unified=0", "--no-color", "--no-ext-diff",
+            "--diff-filter=d", "--src-prefix=a/", "--dst-prefix=b/",
+            merge_base
+        ],
+        cwd=toplevel,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+
+    changed = defaultdict(list)
+    current_file = None
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            # Git appends a tab to file headers whose path contains a space
+            target = line[4:].rstrip("\t")
+            current_file = target[2:] if target.startswith("b/") else None
+            continue
+
+        match = HUNK_HEADER_RE.match(line)
+        if match and current_file:
+            start = int(match.group(1))
+            count = int(match.group(2)) if match.group(2) is not None else 1
+            # Pure deletions have no target lines; anchor them to the line they follow
+            end = start + count - 1 if count else start
+            changed[current_file].append((max(start, 1), max(end, 1)))
+
+    return dict(changed)
+
+
+def issue_overlaps_changed_lines(
+    issue: SonarIssue,
+    changed_ranges: dict[str, list[tuple[int, int]]]
+) -> bool:
+    """
+    Check whether an issue's text range overlaps a changed hunk.
+
+    File-level issues (no line information) match when their file changed.
+    """
+    ranges = changed_ranges.get(issue.file_path)
+    if not ranges:
+        return False
+
+    if issue.textRange:
+        start = issue.textRange.get("startLine", issue.line)
+        end = issue.textRange.get("endLine", start)
+    else:
+        start = end = issue.line
+
+    return start is None or any(start <= hunk_end and end >= hunk_start for hunk_start, hunk_end in ranges)
+
+
+def _result_text(result) -> str:
+    """Agent run output (`.output` in pydantic-ai >= 1.0, `.data` before)."""
+    return result.output if hasattr(result, "output") else result.data
+
+
+def select_model(issues: list[SonarIssue], model: str, fast_model: Optional[str] = None) -> str:
+    """Route files with only minor code smells to the fast model, everything else to the main one."""
+    if fast_model and all(
+        issue.type in FAST_MODEL_TYPES and issue.severity in FAST_MODEL_SEVERITIES
+        for issue in issues
+    ):
+        return fast_model
+    return model
+
+
 async def analyze_file_issues(
     file_path: str,
     issues: list[SonarIssue],
-    repo_root: Path
+    repo_root: Path,
+    agent: Agent
 ) -> FileFixes:
     """
     Step 1: Analyze all issues in a file and generate fix plan.
@@ -232,6 +833,7 @@ async def analyze_file_issues(
         file_path: Path to the file
         issues: List of issues in this file
         repo_root: Repository root directory
+        agent: Analysis agent to run the prompt with
 
     Returns:
         FileFixes object with proposed fixes
@@ -277,18 +879,9 @@ For each issue, provide:
 Focus on fixes that can be applied together without conflicts.
 """
 
-    # Create analysis agent
-    analysis_agent = Agent(
-        "openai:gpt-4o",
-        system_prompt="""You are a code quality expert specializing in fixing SonarQube issues.
-Your goal is to propose clear, safe, and effective fixes for code quality issues.
-Always consider the context of the entire file when proposing fixes.
-Prioritize fixes that improve code quality without changing functionality."""
-    )
-
     try:
-        result = await analysis_agent.run(prompt)
-        analysis_text = result.data
+        result = await agent.run(prompt)
+        analysis_text = _result_text(result)
 
         # For now, create placeholder fixes - we'll parse the agent response properly later
         fixes = [
@@ -328,6 +921,7 @@ Prioritize fixes that improve code quality without changing functionality."""
 async def apply_file_fixes(
     file_fixes: FileFixes,
     repo_root: Path,
+    agent: Agent,
     dry_run: bool = True
 ) -> dict[str, any]:
     """
@@ -336,6 +930,7 @@ async def apply_file_fixes(
     Args:
         file_fixes: FileFixes object with proposed fixes
         repo_root: Repository root directory
+        agent: Fixing agent to run the prompt with
         dry_run: If True, don't actually modify files
 
     Returns:
@@ -379,24 +974,17 @@ FIXES TO APPLY:
 
 Apply all fixes that are safe and don't conflict. Return ONLY the fixed file content, no explanations."""
 
-    # Create fixing agent
-    fixing_agent = Agent(
-        "openai:gpt-4o",
-        system_prompt="""You are a precise code editor. Apply the requested fixes exactly.
-Return only the complete fixed file content with no additional commentary.
-Ensure all fixes are applied correctly and the code remains syntactically valid."""
-    )
-
     try:
-        result = await fixing_agent.run(prompt)
-        fixed_content = result.data
+        result = await agent.run(prompt)
+        fixed_content = _result_text(result)
 
         if dry_run:
             logger.info(f"DRY RUN: Would update {file_fixes.file_path}")
             return {
                 "success": True,
                 "fixes_applied": len(file_fixes.fixes),
-                "dry_run": True
+                "dry_run": True,
+                "fixed_content": fixed_content
             }
 
         # Actually write the file
@@ -446,6 +1034,330 @@ async def fix_issue_with_agent(issue: SonarIssue, repo_root: Path) -> bool:
     return False  # Return True when actually implemented
 
 
+class IssueWatcher:
+    """
+    Long-running service that fixes files as new issues appear.
+
+    Polls SonarQube for issues updated since the last poll (and polls
+    immediately when an analysis-completed webhook arrives), then queues only
+    files with new or changed issues into a fixed pool of workers. The
+    SonarQube client and model agents stay warm for the lifetime of the process.
+
+    The first poll only records the current state, so the existing backlog is
+    left alone and only issues created or updated after startup are processed.
+    In dry-run mode prepared fixes are saved as patches under `patch_dir`.
+    """
+
+    def __init__(
+        self,
+        client: SonarQubeClient,
+        models: ModelPool,
+        query: dict,
+        repo_root: Path,
+        model: str,
+        fast_model: Optional[str] = None,
+        path_matcher: Optional[Callable[[str], bool]] = None,
+        dry_run: bool = True,
+        patch_dir: Path = Path("sonarqube_exports/patches"),
+        webhook_secret: str = ""
+    ):
+        self.client = client
+        self.models = models
+        self.query = query
+        self.repo_root = repo_root
+        self.model = model
+        self.fast_model = fast_model
+        self.path_matcher = path_matcher
+        self.dry_run = dry_run
+        self.patch_dir = patch_dir
+        self.webhook_secret = webhook_secret
+
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.pending: dict[str, dict[str, SonarIssue]] = {}
+        self.in_progress: set[str] = set()
+        self.seen: dict[str, Optional[str]] = {}  # issue key -> last seen updateDate
+        self.last_update: Optional[datetime] = None
+        self.wake = asyncio.Event()
+
+    async def seed(self) -> None:
+        """Record the newest issues and the poll cursor without queueing anything."""
+        issues = await self.client.get_issues(
+            **self.query,
+            # Sorts newest-first, so a single page holds the latest update time
+            updated_since=datetime.fromtimestamp(0, timezone.utc),
+            max_issues=500
+        )
+        for issue in issues:
+            self.seen[issue.key] = issue.updateDate
+        self.last_update = max(
+            (issue.updated_at for issue in issues if issue.updated_at),
+            default=datetime.fromtimestamp(0, timezone.utc)
+        )
+        logger.info(f"Watching for issues updated after {self.last_update.isoformat()}")
+
+    async def poll(self) -> int:
+        """Fetch issues updated since the last poll and queue affected files."""
+        if self.last_update is None:
+            await self.seed()
+            return 0
+
+        # Read the whole window since the cursor; capping it would leave older
+        # issues in the window behind the cursor forever
+        issues = await self.fetch_window(self.last_update)
+        update_times = [issue.updated_at for issue in issues if issue.updated_at]
+
+        if self.path_matcher:
+            issues = [issue for issue in issues if self.path_matcher(issue.file_path)]
+
+        queued = 0
+        for file_path, file_issues in group_issues_by_file(issues).items():
+            changed = [issue for issue in file_issues if self.seen.get(issue.key, "") != issue.updateDate]
+            if not changed:
+                continue
+
+            for issue in changed:
+                self.seen[issue.key] = issue.updateDate
+
+            # Merge into a file that is already waiting instead of queueing it
+            # twice; files being processed are re-queued by their worker
+            if file_path not in self.pending:
+                self.pending[file_path] = {}
+                if file_path not in self.in_progress:
+                    self.queue.put_nowait(file_path)
+                    queued += 1
+            self.pending[file_path].update({issue.key: issue for issue in changed})
+
+        self.last_update = max(update_times, default=self.last_update)
+
+        return queued
+
+    async def fetch_window(
+        self,
+        since: datetime,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> list[SonarIssue]:
+        """
+        Fetch every issue updated since `since`, beyond the issues/search cap.
+
+        issues/search stops after 10000 results and cannot filter on update
+        time, so when a window is truncated (e.g. after a quality profile
+        change) it is split by creation date and each half is read separately.
+        Only more than 10000 changed issues created within one second can
+        still exceed the cap; those are logged and the excess is skipped.
+        """
+        issues = await self.client.get_issues(
+            **self.query,
+            updated_since=since,
+            created_after=created_after,
+            created_before=created_before,
+            max_issues=SEARCH_RESULT_LIMIT
+        )
+        if len(issues) < SEARCH_RESULT_LIMIT:
+            return issues
+
+        start = created_after or datetime.fromtimestamp(0, timezone.utc)
+        end = created_before or datetime.now(timezone.utc)
+        half = int((end - start).total_seconds() // 2)
+        if half < 1:
+            logger.warning(
+                f"More than {SEARCH_RESULT_LIMIT} issues created at {start.isoformat()} changed since "
+                f"{since.isoformat()}; the rest are skipped (issues/search result limit)"
+            )
+            return issues
+
+        middle = start + timedelta(seconds=half)
+        older = await self.fetch_window(since, created_after, middle)
+        newer = await self.fetch_window(since, middle, created_before)
+        return older + newer
+
+    async def worker(self) -> None:
+        """Analyze and fix queued files until cancelled."""
+        while True:
+            file_path = await self.queue.get()
+            issues = list(self.pending.pop(file_path, {}).values())
+            self.in_progress.add(file_path)
+            try:
+                if issues:
+                    await self.process_file(file_path, issues)
+            except Exception as e:
+                logger.error(f"Error processing {file_path}: {e}")
+            finally:
+                self.in_progress.discard(file_path)
+                # Changes that arrived while this file was being fixed
+                if file_path in self.pending:
+                    self.queue.put_nowait(file_path)
+                self.queue.task_done()
+
+    async def process_file(self, file_path: str, issues: list[SonarIssue]) -> None:
+        backend = select_model(issues, self.model, self.fast_model)
+        file_fixes = await analyze_file_issues(
+            file_path, issues, self.repo_root, self.models.agent(backend, "analysis")
+        )
+        if not file_fixes.fixes:
+            logger.warning(f"No fixes proposed for {file_path}")
+            return
+
+        result = await apply_file_fixes(
+            file_fixes, self.repo_root, self.models.agent(backend, "fixing"), dry_run=self.dry_run
+        )
+        if not result["success"]:
+            console.print(f"✗ Failed to fix {file_path}: {result.get('error', 'Unknown error')}")
+        elif self.dry_run:
+            patch_path = self.save_patch(file_path, file_fixes.file_content or "", result["fixed_content"])
+            console.print(f"✓ Prepared {result['fixes_applied']} issues in {file_path} ({patch_path})")
+        else:
+            console.print(f"✓ Fixed {result['fixes_applied']} issues in {file_path}")
+
+    def save_patch(self, file_path: str, original: str, fixed: str) -> Path:
+        """Write a prepared fix as a unified diff that applies with `git apply`."""
+        patch_path = (self.patch_dir / f"{file_path}.patch").resolve()
+        if not patch_path.is_relative_to(self.patch_dir.resolve()):
+            raise ValueError(f"Refusing to write patch outside {self.patch_dir}: {file_path}")
+
+        # Model output usually drops the final newline; keep the file's own ending
+        if original.endswith("\n") and not fixed.endswith("\n"):
+            fixed += "\n"
+
+        # difflib omits the marker git needs for lines without a trailing newline
+        patch = "".join(
+            line if line.endswith("\n") else f"{line}\n\\ No newline at end of file\n"
+            for line in difflib.unified_diff(
+                original.splitlines(keepends=True),
+                fixed.splitlines(keepends=True),
+                fromfile=f"a/{file_path}",
+                tofile=f"b/{file_path}"
+            )
+        )
+
+        patch_path.parent.mkdir(parents=True, exist_ok=True)
+        patch_path.write_text(patch)
+
+        check = subprocess.run(
+            ["git", "apply", "--check", str(patch_path)],
+            cwd=self.repo_root,
+            capture_output=True,
+            text=True
+        )
+        if check.returncode != 0:
+            logger.warning(f"Prepared patch for {file_path} does not apply cleanly: {check.stderr.strip()}")
+
+        return patch_path
+
+    def webhook_matches(self, payload: dict) -> bool:
+        """Check that a webhook payload is for the watched project and branch."""
+        project = payload.get("project")
+        if not isinstance(project, dict) or project.get("key") != self.query["project_key"]:
+            return False
+
+        branch = payload.get("branch") or {}
+        if not isinstance(branch, dict):
+            return False
+        if self.query.get("pull_request"):
+            return branch.get("type") == "PULL_REQUEST" and branch.get("name") == self.query["pull_request"]
+        if self.query.get("branch"):
+            return branch.get("name") == self.query["branch"]
+        return not branch or branch.get("isMain", False)
+
+    async def handle_webhook(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Minimal HTTP handler for SonarQube analysis-completed webhooks."""
+        status = "204 No Content"
+        try:
+            request_line, headers, body = await asyncio.wait_for(
+                self._read_webhook_request(reader), timeout=WEBHOOK_READ_TIMEOUT
+            )
+
+            if body is None:
+                status = "413 Payload Too Large"
+            elif not request_line.startswith(b"POST "):
+                status = "405 Method Not Allowed"
+            elif self.webhook_secret and not hmac.compare_digest(
+                hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest(),
+                headers.get("x-sonar-webhook-hmac-sha256", "")
+            ):
+                status = "401 Unauthorized"
+            else:
+                payload = json.loads(body or b"{}")
+                if not isinstance(payload, dict):
+                    raise ValueError("payload is not a JSON object")
+                if self.webhook_matches(payload):
+                    logger.info("Analysis completed webhook received, polling now")
+                    self.wake.set()
+        except asyncio.TimeoutError:
+            logger.warning("Timed out reading webhook request")
+            status = "408 Request Timeout"
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Ignoring malformed webhook request: {e}")
+            status = "400 Bad Request"
+        finally:
+            try:
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def _read_webhook_request(self, reader: asyncio.StreamReader) -> tuple[bytes, dict[str, str], Optional[bytes]]:
+        """Read request line, headers and body; the body is None when it exceeds the size cap."""
+        request_line = await reader.readline()
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            if len(headers) >= WEBHOOK_MAX_HEADERS:
+                raise ValueError("too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError("negative Content-Length")
+        if length > WEBHOOK_MAX_BODY_SIZE:
+            return request_line, headers, None
+        return request_line, headers, await reader.readexactly(length)
+
+    async def run(
+        self,
+        poll_interval: float = 60.0,
+        workers: int = 4,
+        webhook_port: Optional[int] = None,
+        webhook_host: str = "127.0.0.1"
+    ) -> None:
+        """Poll (and listen for webhooks) forever, feeding the worker pool."""
+        if workers < 1 or poll_interval <= 0:
+            raise ValueError("workers must be at least 1 and poll_interval must be positive")
+
+        worker_tasks = [asyncio.create_task(self.worker()) for _ in range(workers)]
+        server = None
+        if webhook_port:
+            server = await asyncio.start_server(
+                self.handle_webhook, webhook_host, webhook_port, limit=WEBHOOK_MAX_LINE_SIZE
+            )
+            console.print(f"Listening for SonarQube webhooks on http://{webhook_host}:{webhook_port}/")
+            if webhook_host not in ("127.0.0.1", "localhost", "::1") and not self.webhook_secret:
+                logger.warning("Webhook endpoint is reachable from the network; set SONAR_WEBHOOK_SECRET")
+
+        try:
+            while True:
+                try:
+                    queued = await self.poll()
+                    if queued:
+                        logger.info(f"Queued {queued} files with new or changed issues")
+                except Exception as e:
+                    logger.error(f"Error polling SonarQube: {e}")
+
+                try:
+                    await asyncio.wait_for(self.wake.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+        finally:
+            if server:
+                server.close()
+                await server.wait_closed()
+            for task in worker_tasks:
+                task.cancel()
+            await asyncio.gather(*worker_tasks, return_exceptions=True)
+
+
 async def main(
     severity_filter: Optional[list[str]] = None,
     impact_severity_filter: Optional[list[str]] = None,
@@ -456,7 +1368,13 @@ async def main(
     max_issues: int = 100,
     dry_run: bool = True,
     auto_commit: bool = False,
-    save_json: Optional[str] = None
+    save_json: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None,
+    model: str = "gpt-4o",
+    fast_model: Optional[str] = None,
+    model_timeout: Optional[float] = None
 ):
     """
     Main function to fetch and fix SonarQube issues.
@@ -472,25 +1390,15 @@ async def main(
         dry_run: If True, only list issues without fixing
         auto_commit: If True, automatically commit fixes
         save_json: If provided, save issues grouped by file to this JSON file
+        changed_since: If provided, only fetch issues on lines changed since this git ref
+        include: Path globs to keep (prefixes are pushed down to the API query)
+        exclude: Path globs to drop
+        model: Model backend name from MODEL_BACKENDS
+        fast_model: Optional backend for files with only minor code smells
+        model_timeout: Override the request timeout (seconds) of the selected backends
     """
     # Load settings
-    try:
-        settings = SonarQubeSettings()
-    except Exception as e:
-        console.print(f"[red]Error loading settings: {e}[/red]")
-        console.print("\n[yellow]Please set the following environment variables:[/yellow]")
-        console.print("  SONAR_URL - Your SonarQube server URL")
-        console.print("  SONAR_TOKEN - Your SonarQube authentication token")
-        console.print("  SONAR_PROJECT_KEY - Your project key in SonarQube")
-        sys.exit(1)
-
-    if not settings.sonar_url or not settings.sonar_token or not settings.sonar_project_key:
-        console.print("[red]Missing required SonarQube configuration![/red]")
-        console.print("\n[yellow]Please set the following environment variables:[/yellow]")
-        console.print("  SONAR_URL - Your SonarQube server URL")
-        console.print("  SONAR_TOKEN - Your SonarQube authentication token")
-        console.print("  SONAR_PROJECT_KEY - Your project key in SonarQube")
-        sys.exit(1)
+    settings = load_settings()
 
     # Default filters
     if severity_filter is None:
@@ -513,9 +1421,42 @@ async def main(
         console.print(f"Impact Severities (new): {', '.join(impact_severity_filter)}")
     console.print(f"Types: {', '.join(type_filter)}")
     console.print(f"Statuses: {', '.join(status_filter)}")
+    if include:
+        console.print(f"Include: {', '.join(include)}")
+    if exclude:
+        console.print(f"Exclude: {', '.join(exclude)}")
     console.print(f"Max issues: {max_issues}")
+    if not dry_run:
+        console.print(f"Model: {model}" + (f" (fast: {fast_model})" if fast_model else ""))
     console.print(f"Mode: {'DRY RUN' if dry_run else 'FIXING'}\n")
 
+    path_matcher = compile_path_matcher(include, exclude) if include or exclude else None
+    query_paths = get_server_side_paths(include) if include else None
+
+    # Resolve changed files from local git
+    changed_ranges = None
+    if changed_since:
+        try:
+            changed_ranges = get_changed_line_ranges(changed_since, Path.cwd())
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            stderr = getattr(e, "stderr", None) or str(e)
+            console.print(f"[red]Error computing changes since {changed_since}: {stderr.strip()}[/red]")
+            sys.exit(1)
+
+        if path_matcher:
+            changed_ranges = {path: ranges for path, ranges in changed_ranges.items() if path_matcher(path)}
+        query_paths = sorted(changed_ranges)
+
+        console.print(f"Changed since {changed_since}: {len(changed_ranges)} files")
+        if not changed_ranges:
+            console.print("[green]No changed files to check! :tada:[/green]")
+            return
+
+    def keep_issue(issue: SonarIssue) -> bool:
+        if path_matcher and not path_matcher(issue.file_path):
+            return False
+        return changed_ranges is None or issue_overlaps_changed_lines(issue, changed_ranges)
+
     # Fetch issues
     async with SonarQubeClient(settings.sonar_url, settings.sonar_token) as client:
         with Progress(
@@ -533,6 +1474,8 @@ async def main(
                 statuses=status_filter,
                 branch=branch,
                 pull_request=pull_request,
+                paths=query_paths,
+                issue_filter=keep_issue if path_matcher or changed_ranges is not None else None,
                 max_issues=max_issues
             )
 
@@ -585,35 +1528,17 @@ async def main(
 
     # Save issues to JSON if requested
     if save_json:
-        output_data = {
-            "metadata": {
-                "server": settings.sonar_url,
-                "project": settings.sonar_project_key,
-                "branch": branch,
-                "pull_request": pull_request,
-                "severities": severity_filter,
-                "types": type_filter,
-                "total_issues": len(issues),
-                "total_files": len(issues_by_file),
-                "fetched_at": "2025-10-17T11:30:00Z"  # You might want to use datetime.now()
-            },
-            "issues_by_file": {}
-        }
-
-        for file_path, file_issues in issues_by_file.items():
-            output_data["issues_by_file"][file_path] = [
-                {
-                    "key": issue.key,
-                    "rule": issue.rule,
-                    "severity": issue.severity,
-                    "line": issue.line,
-                    "message": issue.message,
-                    "type": issue.type,
-                    "status": issue.status,
-                    "effort": issue.effort
-                }
-                for issue in file_issues
-            ]
+        output_data = build_issues_export(issues_by_file, {
+            "server": settings.sonar_url,
+            "project": settings.sonar_project_key,
+            "branch": branch,
+            "pull_request": pull_request,
+            "changed_since": changed_since,
+            "include": include,
+            "exclude": exclude,
+            "severities": severity_filter,
+            "types": type_filter
+        })
 
         save_path = Path(save_json)
         save_path.write_text(json.dumps(output_data, indent=2))
@@ -633,43 +1558,54 @@ async def main(
     total_fixes_applied = 0
     total_failures = 0
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
-        task = progress.add_task(f"Processing {len(issues_by_file)} files...", total=len(issues_by_file))
-
-        for file_path, file_issues in issues_by_file.items():
-            progress.update(task, description=f"Analyzing {file_path[:40]}...")
-
-            # Step 1: Analyze issues and generate fix plan
-            try:
-                file_fixes = await analyze_file_issues(file_path, file_issues, repo_root)
+    backends = {name: MODEL_BACKENDS[name] for name in (model, fast_model) if name}
+    if model_timeout:
+        backends = {name: backend.model_copy(update={"timeout": model_timeout}) for name, backend in backends.items()}
 
-                if not file_fixes.fixes:
-                    logger.warning(f"No fixes proposed for {file_path}")
-                    total_failures += 1
-                    progress.advance(task)
-                    continue
-
-                # Step 2: Apply fixes to the file
-                progress.update(task, description=f"Fixing {file_path[:40]}...")
-                result = await apply_file_fixes(file_fixes, repo_root, dry_run=False)
-
-                if result["success"]:
-                    total_fixes_applied += result["fixes_applied"]
-                    total_files_processed += 1
-                    console.print(f"✓ Fixed {result['fixes_applied']} issues in {file_path}")
-                else:
+    # Agents and their HTTP clients are created once and reused for every file
+    async with ModelPool(backends) as models:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console
+        ) as progress:
+            task = progress.add_task(f"Processing {len(issues_by_file)} files...", total=len(issues_by_file))
+
+            for file_path, file_issues in issues_by_file.items():
+                progress.update(task, description=f"Analyzing {file_path[:40]}...")
+
+                # Step 1: Analyze issues and generate fix plan
+                try:
+                    backend = select_model(file_issues, model, fast_model)
+                    file_fixes = await analyze_file_issues(
+                        file_path, file_issues, repo_root, models.agent(backend, "analysis")
+                    )
+
+                    if not file_fixes.fixes:
+                        logger.warning(f"No fixes proposed for {file_path}")
+                        total_failures += 1
+                        progress.advance(task)
+                        continue
+
+                    # Step 2: Apply fixes to the file
+                    progress.update(task, description=f"Fixing {file_path[:40]}...")
+                    result = await apply_file_fixes(
+                        file_fixes, repo_root, models.agent(backend, "fixing"), dry_run=False
+                    )
+
+                    if result["success"]:
+                        total_fixes_applied += result["fixes_applied"]
+                        total_files_processed += 1
+                        console.print(f"✓ Fixed {result['fixes_applied']} issues in {file_path}")
+                    else:
+                        total_failures += 1
+                        console.print(f"✗ Failed to fix {file_path}: {result.get('error', 'Unknown error')}")
+
+                except Exception as e:
+                    logger.error(f"Error processing {file_path}: {e}")
                     total_failures += 1
-                    console.print(f"✗ Failed to fix {file_path}: {result.get('error', 'Unknown error')}")
 
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {e}")
-                total_failures += 1
-
-            progress.advance(task)
+                progress.advance(task)
 
     console.print(f"\n[bold]Summary:[/bold]")
     console.print(f"  Files processed: {total_files_processed}/{len(issues_by_file)}")
@@ -678,6 +1614,233 @@ async def main(
     console.print(f"  Original issues: {len(issues)}")
 
 
+async def main_batch(
+    targets: list[BatchTarget],
+    output_dir: str = "sonarqube_exports",
+    concurrency: int = 10,
+    severity_filter: Optional[list[str]] = None,
+    impact_severity_filter: Optional[list[str]] = None,
+    type_filter: Optional[list[str]] = None,
+    status_filter: Optional[list[str]] = None,
+    max_issues: int = 100,
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None
+):
+    """
+    Fetch and export issues for many project/branch targets in one process.
+
+    All targets share a single pooled SonarQubeClient, so connections are
+    reused and at most `concurrency` requests are in flight across targets.
+
+    Args:
+        targets: Projects/branches to fetch
+        output_dir: Directory for per-target exports and the combined summary
+        concurrency: Global limit on concurrent SonarQube requests
+        severity_filter: List of old severities to filter (default: BLOCKER, CRITICAL)
+        impact_severity_filter: List of new impact severities to filter
+        type_filter: List of types to filter (default: BUG, VULNERABILITY)
+        status_filter: List of statuses to filter (default: OPEN, CONFIRMED, REOPENED)
+        max_issues: Maximum number of issues to fetch per target
+        include: Path globs to keep (prefixes are pushed down to the API query)
+        exclude: Path globs to drop
+    """
+    settings = load_settings(require_project_key=False)
+
+    # Default filters
+    if severity_filter is None:
+        severity_filter = ["BLOCKER", "CRITICAL"]
+    if type_filter is None:
+        type_filter = ["BUG", "VULNERABILITY"]
+    if status_filter is None:
+        status_filter = ["OPEN", "CONFIRMED", "REOPENED"]
+
+    path_matcher = compile_path_matcher(include, exclude) if include or exclude else None
+    query_paths = get_server_side_paths(include) if include else None
+
+    export_dir = Path(output_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    console.print(f"\n[bold cyan]SonarQube Batch Export[/bold cyan]")
+    console.print(f"Server: {settings.sonar_url}")
+    console.print(f"Targets: {len(targets)}")
+    console.print(f"Concurrency: {concurrency}")
+    console.print(f"Output: {export_dir}\n")
+
+    async def fetch_target(client: SonarQubeClient, target: BatchTarget, export_name: str) -> dict:
+        try:
+            issues = await client.get_issues(
+                project_key=target.project_key,
+                severities=severity_filter,
+                impact_severities=impact_severity_filter,
+                types=type_filter,
+                statuses=status_filter,
+                branch=target.branch,
+                pull_request=target.pull_request,
+                paths=query_paths,
+                issue_filter=(lambda issue: path_matcher(issue.file_path)) if path_matcher else None,
+                max_issues=max_issues
+            )
+        except Exception as e:
+            logger.error(f"Error fetching {target.label}: {e}")
+            return {"target": target.label, "error": str(e)}
+
+        issues_by_file = group_issues_by_file(issues)
+        export_path = export_dir / export_name
+        export_path.write_text(json.dumps(build_issues_export(issues_by_file, {
+            "server": settings.sonar_url,
+            "project": target.project_key,
+            "branch": target.branch,
+            "pull_request": target.pull_request,
+            "include": include,
+            "exclude": exclude,
+            "severities": severity_filter,
+            "types": type_filter
+        }), indent=2))
+
+        return {
+            "target": target.label,
+            "total_issues": len(issues),
+            "total_files": len(issues_by_file),
+            "export": str(export_path)
+        }
+
+    async with SonarQubeClient(settings.sonar_url, settings.sonar_token, max_concurrency=concurrency) as client:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console
+        ) as progress:
+            task = progress.add_task(f"Fetching {len(targets)} targets from SonarQube...", total=None)
+            results = await asyncio.gather(*(
+                fetch_target(client, target, export_name)
+                for target, export_name in zip(targets, unique_export_names(targets))
+            ))
+            progress.update(task, completed=True)
+
+    table = Table(title=f"Batch Summary ({len(targets)} targets)")
+    table.add_column("Target", style="green")
+    table.add_column("Issues", style="yellow", justify="right")
+    table.add_column("Files", style="yellow", justify="right")
+    table.add_column("Export", style="cyan")
+
+    for result in results:
+        if "error" in result:
+            table.add_row(result["target"], "-", "-", f"[red]{result['error'][:60]}[/red]")
+        else:
+            table.add_row(result["target"], str(result["total_issues"]), str(result["total_files"]), result["export"])
+
+    console.print(table)
+
+    summary_path = export_dir / "summary.json"
+    summary_path.write_text(json.dumps({
+        "server": settings.sonar_url,
+        "fetched_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "total_issues": sum(result.get("total_issues", 0) for result in results),
+        "failed_targets": sum(1 for result in results if "error" in result),
+        "targets": results
+    }, indent=2))
+    console.print(f"\n[green]✓ Saved combined summary to {summary_path}[/green]")
+
+    if any("error" in result for result in results):
+        sys.exit(1)
+
+
+async def main_watch(
+    severity_filter: Optional[list[str]] = None,
+    impact_severity_filter: Optional[list[str]] = None,
+    type_filter: Optional[list[str]] = None,
+    status_filter: Optional[list[str]] = None,
+    branch: Optional[str] = None,
+    pull_request: Optional[str] = None,
+    dry_run: bool = True,
+    output_dir: str = "sonarqube_exports",
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None,
+    model: str = "gpt-4o",
+    fast_model: Optional[str] = None,
+    model_timeout: Optional[float] = None,
+    poll_interval: float = 60.0,
+    workers: int = 4,
+    webhook_port: Optional[int] = None,
+    webhook_host: str = "127.0.0.1"
+):
+    """
+    Run as a long-lived service that fixes new issues as they appear.
+
+    Args:
+        severity_filter: List of old severities to filter (default: BLOCKER, CRITICAL)
+        impact_severity_filter: List of new impact severities to filter
+        type_filter: List of types to filter (default: BUG, VULNERABILITY)
+        status_filter: List of statuses to filter (default: OPEN, CONFIRMED, REOPENED)
+        branch: Branch name to watch
+        pull_request: Pull request ID/key to watch
+        dry_run: If True, save prepared fixes as patches instead of writing files
+        output_dir: Directory whose patches/ subdirectory receives prepared fixes
+        include: Path globs to keep (prefixes are pushed down to the API query)
+        exclude: Path globs to drop
+        model: Model backend name from MODEL_BACKENDS
+        fast_model: Optional backend for files with only minor code smells
+        model_timeout: Override the request timeout (seconds) of the selected backends
+        poll_interval: Seconds between polls when no webhook arrives
+        workers: Number of files processed concurrently
+        webhook_port: If provided, accept SonarQube webhooks on this port
+        webhook_host: Address the webhook endpoint binds to
+    """
+    settings = load_settings()
+
+    # Default filters
+    if severity_filter is None:
+        severity_filter = ["BLOCKER", "CRITICAL"]
+    if type_filter is None:
+        type_filter = ["BUG", "VULNERABILITY"]
+    if status_filter is None:
+        status_filter = ["OPEN", "CONFIRMED", "REOPENED"]
+
+    backends = {name: MODEL_BACKENDS[name] for name in (model, fast_model) if name}
+    if model_timeout:
+        backends = {name: backend.model_copy(update={"timeout": model_timeout}) for name, backend in backends.items()}
+
+    console.print(f"\n[bold cyan]SonarQube Issue Watcher[/bold cyan]")
+    console.print(f"Server: {settings.sonar_url}")
+    console.print(f"Project: {settings.sonar_project_key}")
+    if branch:
+        console.print(f"Branch: {branch}")
+    if pull_request:
+        console.print(f"Pull Request: {pull_request}")
+    console.print(f"Model: {model}" + (f" (fast: {fast_model})" if fast_model else ""))
+    console.print(f"Poll interval: {poll_interval}s, workers: {workers}")
+    console.print(f"Mode: {'DRY RUN' if dry_run else 'FIXING'}\n")
+
+    async with SonarQubeClient(settings.sonar_url, settings.sonar_token) as client, ModelPool(backends) as models:
+        watcher = IssueWatcher(
+            client=client,
+            models=models,
+            query={
+                "project_key": settings.sonar_project_key,
+                "severities": severity_filter,
+                "impact_severities": impact_severity_filter,
+                "types": type_filter,
+                "statuses": status_filter,
+                "branch": branch,
+                "pull_request": pull_request,
+                "paths": get_server_side_paths(include) if include else None
+            },
+            repo_root=Path.cwd(),
+            model=model,
+            fast_model=fast_model,
+            path_matcher=compile_path_matcher(include, exclude) if include or exclude else None,
+            dry_run=dry_run,
+            patch_dir=Path(output_dir) / "patches",
+            webhook_secret=settings.sonar_webhook_secret
+        )
+        await watcher.run(
+            poll_interval=poll_interval,
+            workers=workers,
+            webhook_port=webhook_port,
+            webhook_host=webhook_host
+        )
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -722,7 +1885,7 @@ if __name__ == "__main__":
         "--max-issues",
         type=int,
         default=100,
-        help="Maximum number of issues to process (default: 100)"
+        help="Maximum number of issues to process (default: 100; per target in batch mode, unused in watch mode)"
     )
     parser.add_argument(
         "--fix",
@@ -739,18 +1902,176 @@ if __name__ == "__main__":
         type=str,
         help="Save issues grouped by file to JSON file (e.g., sonarqube_issues.json)"
     )
+    parser.add_argument(
+        "--changed-since",
+        type=str,
+        help="Only fetch issues on lines changed since this git ref (e.g., 'origin/main')"
+    )
+    parser.add_argument(
+        "--include",
+        nargs="+",
+        help="Only keep issues in paths matching these globs (e.g., src/ tests/ 'scripts/**/*.py')"
+    )
+    parser.add_argument(
+        "--exclude",
+        nargs="+",
+        help="Drop issues in paths matching these globs (e.g., server/ client/)"
+    )
+    parser.add_argument(
+        "--model",
+        choices=list(MODEL_BACKENDS),
+        help="Model backend used to fix issues (default: gpt-4o; 'ollama' uses OLLAMA_ENDPOINT/OLLAMA_MODEL)"
+    )
+    parser.add_argument(
+        "--fast-model",
+        choices=list(MODEL_BACKENDS),
+        help="Model backend for files with only MINOR/INFO code smells (e.g., gpt-4o-mini)"
+    )
+    parser.add_argument(
+        "--model-timeout",
+        type=float,
+        help="Override the model request timeout in seconds (default depends on backend)"
+    )
+
+    parser.add_argument(
+        "--target",
+        nargs="+",
+        help="Batch mode: fetch these targets (PROJECT, PROJECT@BRANCH or PROJECT@pr:NUMBER)"
+    )
+    parser.add_argument(
+        "--targets-file",
+        type=str,
+        help="Batch mode: JSON file listing targets (specs or {project_key, branch, pull_request} objects)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="sonarqube_exports",
+        help="Batch/watch mode: directory for per-target exports and summary.json, or prepared patches (default: sonarqube_exports)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Batch mode: maximum concurrent SonarQube requests across all targets (default: 10)"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Run as a service that processes issues created or updated after startup (without --fix, fixes are "
+            "saved as patches). Large update bursts are read in creation-date slices; only more than 10000 "
+            "changed issues created in the same second exceed the SonarQube search limit and are skipped"
+        )
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=60.0,
+        help="Watch mode: seconds between polls (default: 60)"
+    )
+    parser.add_argument(
+        "--webhook-port",
+        type=int,
+        help="Watch mode: accept SonarQube analysis webhooks on this port to poll immediately"
+    )
+    parser.add_argument(
+        "--webhook-host",
+        type=str,
+        default="127.0.0.1",
+        help="Watch mode: address the webhook endpoint binds to (default: 127.0.0.1; use 0.0.0.0 for a remote SonarQube)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Watch mode: number of files processed concurrently (default: 4)"
+    )
 
     args = parser.parse_args()
 
-    asyncio.run(main(
-        severity_filter=args.severity,
-        impact_severity_filter=args.impact_severity,
-        type_filter=args.type,
-        status_filter=args.statuses,
-        branch=args.branch,
-        pull_request=args.pull_request,
-        max_issues=args.max_issues,
-        dry_run=not args.fix,
-        auto_commit=args.auto_commit,
-        save_json=args.save_json
-    ))
+    if args.watch:
+        if args.target or args.targets_file or args.changed_since:
+            parser.error("--watch cannot be combined with batch mode or --changed-since")
+        if args.workers < 1:
+            parser.error("--workers must be at least 1")
+        if args.poll_interval <= 0:
+            parser.error("--poll-interval must be greater than 0")
+
+        asyncio.run(main_watch(
+            severity_filter=args.severity,
+            impact_severity_filter=args.impact_severity,
+            type_filter=args.type,
+            status_filter=args.statuses,
+            branch=args.branch,
+            pull_request=args.pull_request,
+            dry_run=not args.fix,
+            output_dir=args.output_dir,
+            include=args.include,
+            exclude=args.exclude,
+            model=args.model or "gpt-4o",
+            fast_model=args.fast_model,
+            model_timeout=args.model_timeout,
+            poll_interval=args.poll_interval,
+            workers=args.workers,
+            webhook_port=args.webhook_port,
+            webhook_host=args.webhook_host
+        ))
+    elif args.target or args.targets_file:
+        if args.fix or args.changed_since:
+            parser.error("--fix and --changed-since need a single local checkout and cannot be used in batch mode")
+        unsupported = [
+            flag for flag, value in (
+                ("--branch", args.branch),
+                ("--pull-request", args.pull_request),
+                ("--save-json", args.save_json),
+                ("--auto-commit", args.auto_commit),
+                ("--model", args.model),
+                ("--fast-model", args.fast_model),
+                ("--model-timeout", args.model_timeout)
+            )
+            if value
+        ]
+        if unsupported:
+            parser.error(
+                f"{', '.join(unsupported)} cannot be used in batch mode "
+                "(set branches per target as PROJECT@BRANCH; exports go to --output-dir)"
+            )
+        if args.concurrency < 1:
+            parser.error("--concurrency must be at least 1")
+
+        targets = [parse_target(spec) for spec in args.target or []]
+        if args.targets_file:
+            targets.extend(load_targets(Path(args.targets_file)))
+
+        asyncio.run(main_batch(
+            targets=targets,
+            output_dir=args.output_dir,
+            concurrency=args.concurrency,
+            severity_filter=args.severity,
+            impact_severity_filter=args.impact_severity,
+            type_filter=args.type,
+            status_filter=args.statuses,
+            max_issues=args.max_issues,
+            include=args.include,
+            exclude=args.exclude
+        ))
+    else:
+        asyncio.run(main(
+            severity_filter=args.severity,
+            impact_severity_filter=args.impact_severity,
+            type_filter=args.type,
+            status_filter=args.statuses,
+            branch=args.branch,
+            pull_request=args.pull_request,
+            max_issues=args.max_issues,
+            dry_run=not args.fix,
+            auto_commit=args.auto_commit,
+            save_json=args.save_json,
+            changed_since=args.changed_since,
+            include=args.include,
+            exclude=args.exclude,
+            model=args.model or "gpt-4o",
+            fast_model=args.fast_model,
+            model_timeout=args.model_timeout
+        ))